@@ -120,6 +120,11 @@ def create_app():
 
 
 if __name__ == '__main__':
+    # Logging is configured by the entry point only, never at import time
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
     app = create_app()
     # Fix for Replit: bind to 0.0.0.0 to make it accessible from web
     port = int(os.environ.get('PORT', 5000))
@@ -1,64 +1,124 @@
+import json
 import logging
 import os
-import openai
+import threading
+import zlib
+from openai import OpenAI
 from typing import Dict, Any, List
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on user message length in characters; bounds prompt tokens.
+# Session cookie size is bounded separately by MAX_HISTORY_BYTES.
+MAX_MESSAGE_LENGTH = 500
+
+# Bound how long a stalled OpenAI call can hold a worker (seconds), and retry once
+OPENAI_TIMEOUT_SECONDS = 10.0
+OPENAI_MAX_RETRIES = 1
+
+# Cap on in-flight OpenAI calls per process, to stay under the account's rate limits
+OPENAI_MAX_CONCURRENCY = 8
+_openai_slots = threading.BoundedSemaphore(OPENAI_MAX_CONCURRENCY)
+
+# Conversation turns kept in the session (last 3 exchanges); older ones are dropped
+MAX_HISTORY_MESSAGES = 6
+
+# Byte budget for the stored history, measured the way Flask's session cookie
+# is built: compact ASCII-escaped JSON, zlib-compressed, then base64 (x4/3).
+# 2700 compressed bytes is ~3600 after base64, leaving room for the signature
+# and cookie attributes under the browser's 4093-byte limit.
+MAX_HISTORY_BYTES = 2700
+
+# System messages are built once at import instead of on every call
+CHAT_SYSTEM_MESSAGE = {"role": "system", "content": "You are a helpful plant expert that helps users find the perfect plants for their needs. Ask relevant questions about their location, lighting, maintenance preferences, and purpose to provide the best recommendations."}
+RECOMMENDATION_SYSTEM_MESSAGE = {"role": "system", "content": "You are a helpful plant expert that provides detailed plant recommendations."}
+
+# Static prompt text, built once at import and filled in per request
+RECOMMENDATION_PROMPT_TEMPLATE = """Based on the following user preferences, recommend 3 suitable plants and provide a brief explanation for each:
+
+Location: {location}
+Lighting: {lighting}
+Maintenance Level: {maintenance}
+Purpose: {purpose}
+
+For each recommended plant, include:
+1. Plant name (common and scientific)
+2. Brief description
+3. Care requirements
+4. Why it's a good fit
+
+Format the response in a clean, easy-to-read way."""
+
 class ChatService:
     def __init__(self):
         self.openai_api_key = os.getenv('OPENAI_API_KEY')
         if not self.openai_api_key:
             logger.warning("OPENAI_API_KEY not found in environment variables")
         
-        # Initialize conversation history
-        self.conversation_history = [
-            {"role": "system", "content": "You are a helpful plant expert that recommends indoor and outdoor plants based on user preferences. Ask questions one at a time to understand their needs regarding location, lighting, maintenance level, and purpose. Keep responses concise and friendly."}
-        ]
+        # One client per service so its HTTP connection pool is reused across calls
+        self.client = OpenAI(
+            api_key=self.openai_api_key,
+            timeout=OPENAI_TIMEOUT_SECONDS,
+            max_retries=OPENAI_MAX_RETRIES
+        ) if self.openai_api_key else None
+    
+    def _create_completion(self, **kwargs):
+        # Wait no longer than a single call may take; None means no slot was free
+        if not _openai_slots.acquire(timeout=OPENAI_TIMEOUT_SECONDS):
+            logger.warning("Timed out waiting for an OpenAI request slot")
+            return None
+        try:
+            return self.client.chat.completions.create(**kwargs)
+        finally:
+            _openai_slots.release()
     
     def _get_plant_recommendation(self, user_preferences: Dict[str, str]) -> str:
         try:
-            if not self.openai_api_key:
+            if not self.client:
                 return "I'm sorry, the plant recommendation service is currently unavailable."
-                
-            openai.api_key = self.openai_api_key
-            
-            prompt = f"""Based on the following user preferences, recommend 3 suitable plants and provide a brief explanation for each:
             
-            Location: {location}
-            Lighting: {lighting}
-            Maintenance Level: {maintenance}
-            Purpose: {purpose}
-            
-            For each recommended plant, include:
-            1. Plant name (common and scientific)
-            2. Brief description
-            3. Care requirements
-            4. Why it's a good fit
-            
-            Format the response in a clean, easy-to-read way.""".format(
+            prompt = RECOMMENDATION_PROMPT_TEMPLATE.format(
                 location=user_preferences.get('location', 'Not specified'),
                 lighting=user_preferences.get('lighting', 'Not specified'),
                 maintenance=user_preferences.get('maintenance', 'Not specified'),
                 purpose=user_preferences.get('purpose', 'Not specified')
             )
             
-            response = openai.ChatCompletion.create(
+            response = self._create_completion(
                 model="gpt-3.5-turbo",
                 messages=[
-                    {"role": "system", "content": "You are a helpful plant expert that provides detailed plant recommendations."},
+                    RECOMMENDATION_SYSTEM_MESSAGE,
                     {"role": "user", "content": prompt}
                 ],
                 max_tokens=500,
                 temperature=0.7
             )
+            if response is None:
+                return "I'm sorry, the plant recommendation service is currently unavailable."
             
-            return response.choices[0].message['content'].strip()
+            return response.choices[0].message.content.strip()
             
         except Exception as e:
             logger.error(f"Error getting plant recommendation: {e}")
             return "I'm sorry, I encountered an error while processing your request. Please try again later."
     
+    @staticmethod
+    def _history_size(history: List[Dict[str, str]]) -> int:
+        # Compressed size of the history as Flask's session serializer encodes it
+        return len(zlib.compress(json.dumps(history, separators=(',', ':')).encode('ascii')))
+    
+    @staticmethod
+    def _save_history(session: Dict[str, Any], history: List[Dict[str, str]]) -> None:
+        # History holds complete user/assistant exchanges. Keep the newest ones
+        # that fit both the message count and the cookie byte budget, dropping
+        # whole exchanges so the stored history always starts with a user turn.
+        history = history[-MAX_HISTORY_MESSAGES:]
+        # An exchange too large to fit on its own is not stored at all.
+        while history and ChatService._history_size(history) > MAX_HISTORY_BYTES:
+            del history[:2]
+        # Reassign rather than mutate in place so the Flask session is marked modified
+        session['conversation'] = history
+    
     def process(self, message: str, session: Dict[str, Any]) -> Dict[str, Any]:
         try:
             # Store or update conversation history in session
@@ -66,39 +126,46 @@ class ChatService:
                 session['conversation'] = []
                 session['user_preferences'] = {}
             
-            # Add user message to conversation history
-            session['conversation'].append({"role": "user", "content": message})
+            # Capped to a sane length; log it so abusive clients are visible
+            if len(message) > MAX_MESSAGE_LENGTH:
+                logger.warning(
+                    f"Truncating chat message from {len(message)} to {MAX_MESSAGE_LENGTH} characters"
+                )
+                message = message[:MAX_MESSAGE_LENGTH]
+            
+            # The user turn is only stored once it has a reply, so a failed call
+            # never leaves two user turns in a row in the saved history
+            history = session['conversation'][-(MAX_HISTORY_MESSAGES - 2):]
+            history.append({"role": "user", "content": message})
             
             # Get response from OpenAI
-            if self.openai_api_key:
-                openai.api_key = self.openai_api_key
-                
+            if self.client:
                 # Prepare messages for OpenAI (system message + conversation history)
-                messages = [
-                    {"role": "system", "content": "You are a helpful plant expert that helps users find the perfect plants for their needs. Ask relevant questions about their location, lighting, maintenance preferences, and purpose to provide the best recommendations."}
-                ] + session['conversation'][-6:]  # Keep last 3 exchanges (6 messages)
+                messages = [CHAT_SYSTEM_MESSAGE] + history
                 
-                response = openai.ChatCompletion.create(
+                response = self._create_completion(
                     model="gpt-3.5-turbo",
                     messages=messages,
                     max_tokens=150,
                     temperature=0.7
                 )
                 
-                bot_response = response.choices[0].message['content'].strip()
-                
-                # Add bot response to conversation history
-                session['conversation'].append({"role": "assistant", "content": bot_response})
-                
-                return {
-                    'response': bot_response,
-                    'status': 'success'
-                }
-            else:
-                return {
-                    'response': "I'm sorry, the chat service is currently unavailable.",
-                    'status': 'error'
-                }
+                if response is not None:
+                    bot_response = response.choices[0].message.content.strip()
+                    
+                    # Store the completed exchange in the conversation history
+                    history.append({"role": "assistant", "content": bot_response})
+                    self._save_history(session, history)
+                    
+                    return {
+                        'response': bot_response,
+                        'status': 'success'
+                    }
+            
+            return {
+                'response': "I'm sorry, the chat service is currently unavailable.",
+                'status': 'error'
+            }
                 
         except Exception as e:
             logger.error(f"Error processing chat message: {e}")
@@ -10,11 +10,12 @@ This module provides subscription management functionality including:
 from enum import Enum
 from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
-from threading import RLock
+from threading import Lock
+from types import MappingProxyType
 import logging
 import re
 from email_validator import validate_email, EmailNotValidError
-from functools import wraps
+from functools import lru_cache, wraps
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -22,6 +23,7 @@ logger = logging.getLogger(__name__)
 # Constants
 MAX_EMAIL_LENGTH = 254
 MAX_FEATURE_NAME_LENGTH = 100
+EMAIL_VALIDATION_CACHE_SIZE = 1024
 
 class SubscriptionTier(str, Enum):
     """Enum for subscription tiers.
@@ -41,10 +43,12 @@ class SubscriptionFeature:
     Attributes:
         name: Unique identifier for the feature
         description: Human-readable description of the feature
-        tiers: List of subscription tiers that have access to this feature
+        tiers: Set of subscription tiers that have access to this feature
         limits: Dictionary mapping tiers to their respective usage limits
     """
     
+    __slots__ = ('name', 'description', 'tiers', 'limits')
+    
     def __init__(
         self,
         name: str,
@@ -70,7 +74,8 @@ class SubscriptionFeature:
             
         self.name = name
         self.description = description
-        self.tiers = tiers or [SubscriptionTier.PREMIUM]
+        # Frozen for O(1) tier membership checks on every access/quota lookup
+        self.tiers = frozenset(tiers or (SubscriptionTier.PREMIUM,))
         self.limits = limits or {}
 
 def validate_email_address(email: str) -> str:
@@ -88,6 +93,17 @@ def validate_email_address(email: str) -> str:
     if not email or not isinstance(email, str) or len(email) > MAX_EMAIL_LENGTH:
         raise ValueError("Invalid email format")
         
+    return _normalize_email(email)
+
+
+@lru_cache(maxsize=EMAIL_VALIDATION_CACHE_SIZE)
+def _normalize_email(email: str) -> str:
+    """Validate an email string, memoizing successful results.
+    
+    Every service method re-validates its email argument and validation may
+    perform DNS deliverability checks, so repeat lookups are served from cache.
+    Failures raise and are therefore never cached.
+    """
     try:
         # Validate and normalize the email
         valid = validate_email(email)
@@ -124,31 +140,31 @@ class SubscriptionService:
     """
     
     # Define subscription plans and features
-    PLANS = {
-        SubscriptionTier.FREE: {
+    PLANS = MappingProxyType({
+        SubscriptionTier.FREE: MappingProxyType({
             'name': 'Free Plan',
             'price_monthly': 0,
             'price_yearly': 0,
             'description': 'Basic access to plant recommendations',
-            'features': []
-        },
-        SubscriptionTier.SUBSCRIBER: {
+            'features': ()
+        }),
+        SubscriptionTier.SUBSCRIBER: MappingProxyType({
             'name': 'Subscriber',
             'price_monthly': 4.99,
             'price_yearly': 49.99,
             'description': 'Enhanced access with custom plant kits',
-            'features': []
-        },
-        SubscriptionTier.PREMIUM: {
+            'features': ()
+        }),
+        SubscriptionTier.PREMIUM: MappingProxyType({
             'name': 'Premium',
             'price_monthly': 9.99,
             'price_yearly': 99.99,
             'description': 'Complete access with unlimited plants',
-            'features': []
-        }
-    }
+            'features': ()
+        })
+    })
     
-    FEATURES = [
+    FEATURES = (
         # Basic features (all tiers)
         SubscriptionFeature(
             'plant_recommendations',
@@ -161,12 +177,23 @@ class SubscriptionService:
             }
         ),
         # Add more features as needed
-    ]
+    )
+
+    # Read-only name -> feature index, built once for O(1) feature lookups
+    FEATURES_BY_NAME = MappingProxyType({feature.name: feature for feature in FEATURES})
+
+    # Read-only tier -> features index, so details don't rescan FEATURES per tier
+    # (FEATURES is bound as the outermost iterable because class-scope names
+    # are not visible inside the nested generator)
+    FEATURES_BY_TIER = MappingProxyType({
+        tier: tuple(f for f in features if tier in f.tiers)
+        for features in (FEATURES,) for tier in SubscriptionTier
+    })
     
     def __init__(self):
         """Initialize the subscription service."""
         self._user_quotas: Dict[Tuple[str, str], int] = {}
-        self._quota_lock = RLock()
+        self._quota_lock = Lock()
         self._initialize_features()
         
     def _initialize_features(self) -> None:
@@ -216,9 +243,9 @@ class SubscriptionService:
         email = validate_email_address(email)
         tier = self.get_user_tier(email)
         
-        for feature in self.FEATURES:
-            if feature.name == feature_name:
-                return tier in feature.tiers
+        feature = self.FEATURES_BY_NAME.get(feature_name)
+        if feature is not None:
+            return tier in feature.tiers
                 
         logger.warning(f"Unknown feature: {feature_name}")
         return False
@@ -249,7 +276,7 @@ class SubscriptionService:
             return False, "Feature not available in your plan", 0
             
         tier = self.get_user_tier(email)
-        feature = next((f for f in self.FEATURES if f.name == feature_name), None)
+        feature = self.FEATURES_BY_NAME.get(feature_name)
         
         if not feature:
             logger.warning(f"Unknown feature: {feature_name}")
@@ -283,8 +310,9 @@ class SubscriptionService:
             
         email = validate_email_address(email)
         
-        with self._quota_lock:
-            return self._user_quotas.get((email, feature_name), 0)
+        # A single dict.get is atomic, so reads skip the lock that
+        # serializes read-modify-write updates in increment_usage
+        return self._user_quotas.get((email, feature_name), 0)
     
     @handle_subscription_errors
     def increment_usage(self, email: str, feature_name: str, amount: int = 1) -> int:
@@ -308,11 +336,12 @@ class SubscriptionService:
             
         email = validate_email_address(email)
         
+        key = (email, feature_name)
+        quotas = self._user_quotas
         with self._quota_lock:
-            key = (email, feature_name)
-            current = self._user_quotas.get(key, 0)
-            self._user_quotas[key] = current + amount
-            return self._user_quotas[key]
+            usage = quotas.get(key, 0) + amount
+            quotas[key] = usage
+            return usage
     
     @handle_subscription_errors
     def get_subscription_details(self, email: str) -> Dict[str, Any]:
@@ -342,25 +371,26 @@ class SubscriptionService:
         
         # Add feature usage information
         plan['features'] = []
-        for feature in self.FEATURES:
-            if tier in feature.tiers:
-                try:
-                    has_quota, message, remaining = self.check_quota(email, feature.name)
-                    plan['features'].append({
-                        'name': feature.name,
-                        'description': feature.description,
-                        'has_quota': has_quota,
-                        'message': message,
-                        'remaining': remaining
-                    })
-                except Exception as e:
-                    logger.error(f"Error checking quota for {feature.name}: {str(e)}")
-                    continue
+        for feature in self.FEATURES_BY_TIER.get(tier, ()):
+            try:
+                has_quota, message, remaining = self.check_quota(email, feature.name)
+                plan['features'].append({
+                    'name': feature.name,
+                    'description': feature.description,
+                    'has_quota': has_quota,
+                    'message': message,
+                    'remaining': remaining
+                })
+            except Exception as e:
+                logger.error(f"Error checking quota for {feature.name}: {str(e)}")
+                continue
                 
+        # Read the clock once so both timestamps agree
+        now = datetime.utcnow()
         return {
             'tier': tier.value,
             'plan': plan,
             'status': 'active',
-            'next_billing_date': (datetime.utcnow() + timedelta(days=30)).strftime('%Y-%m-%d'),
-            'last_updated': datetime.utcnow().isoformat()
+            'next_billing_date': (now + timedelta(days=30)).strftime('%Y-%m-%d'),
+            'last_updated': now.isoformat()
         }